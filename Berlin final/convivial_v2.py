@@ -1,11 +1,36 @@
 from flask import Flask, request, jsonify
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
+import asyncio
+import atexit
+import functools
+import hashlib
+import inspect
+import json
+import queue
+import shelve
+import threading
+import time
 import os
+import uuid
+from dataclasses import dataclass, field
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
 
 load_dotenv()  # loads variables from .env
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+aclient = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+# One long-lived event loop for all async work, so the AsyncOpenAI connection
+# pool is never shared across loops (asyncio.run per request would close it).
+_LOOP = asyncio.new_event_loop()
+threading.Thread(target=_LOOP.run_forever, daemon=True).start()
+
+
+def run_async(coro):
+    """Run a coroutine on the shared event loop and block until it finishes."""
+    return asyncio.run_coroutine_threadsafe(coro, _LOOP).result()
 
 # URL of the dramatization server
 DRAMA_SERVER_URL = "http://localhost:8001"
@@ -22,50 +47,283 @@ PARTICIPANTS = {
     "human": "",  # human can be proposer (manual text), not a participant in discussion or voting
 }
 
-ASSISTANTS = PARTICIPANTS
+# AI characters (everyone but the human), in PARTICIPANTS order; computed once
+AI_ACTORS: tuple[str, ...] = tuple(n for n in PARTICIPANTS if n != "human")
 clerk = "asst_DkQkw8cR4RxcpXHOFvApxnuL"
 
+# Keep-alive session to the dramatization server, shared by all actors and phases
+DRAMA_SESSION = requests.Session()
+DRAMA_SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+atexit.register(DRAMA_SESSION.close)
+
 app = Flask(__name__)
 
-# Global parliament state
-STATE = {
-    "proposal": "",
-    "proposer": "",
-    "conversation": "",
-    "discussion": {"responses": {}, "done": False},
-    "voting": {"votes": {}, "done": False},
-    "phase": "discussion",
-    "actors_order": [],  # the order of AI characters (non-human) if provided
-}
+# --- Parliament state ---
+@dataclass
+class Parliament:
+    """State of one parliament run; each /parliament request gets its own."""
+    proposal: str
+    proposer: str
+    actors_order: list = field(default_factory=list)  # the order of AI characters (non-human)
+    conversation: str = ""
+    responses: dict = field(default_factory=dict)
+    votes: dict = field(default_factory=dict)
+    discussion_done: bool = False
+    voting_done: bool = False
+    phase: str = "discussion"
+    clerk_summary: str = ""
+    threads: dict = field(default_factory=dict)  # actor name -> {"id": OpenAI thread id, "sent": history already posted}
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+
+# Recent runs by id, for status queries (oldest dropped beyond PARLIAMENT_HISTORY)
+PARLIAMENT_HISTORY = 50
+PARLIAMENTS: dict[str, Parliament] = {}
+_parliaments_lock = threading.Lock()  # waitress serves requests on several threads
+
+# --- Response cache ---
+# Exact tier: md5(assistant_id | prompt) -> reply, in a shelve file.
+# Semantic tier: per assistant, prompt embeddings (.npz) + replies (.json);
+# a stored reply is reused when cosine similarity exceeds CACHE_SIMILARITY.
+CACHE_ENABLED = os.getenv("CONVIVIAL_CACHE", "1") != "0"
+CACHE_DIR = os.path.expanduser("~/.convivial_cache")
+CACHE_SIMILARITY = 0.95
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+_cache_lock = threading.Lock()
+_semantic_cache = {}  # assistant_id -> (embeddings matrix, list of replies)
+
+
+def _exact_key(assistant_id: str, conversation_history: str) -> str:
+    return hashlib.md5(f"{assistant_id}|{conversation_history}".encode("utf-8")).hexdigest()
+
+
+def _normalize(vector) -> np.ndarray:
+    v = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(v)
+    return v / norm if norm else v
+
+
+def _load_semantic(assistant_id: str):
+    """Return (embeddings, replies) for an assistant; caller holds _cache_lock."""
+    if assistant_id not in _semantic_cache:
+        base = os.path.join(CACHE_DIR, assistant_id)
+        try:
+            embeddings = np.load(base + ".npz")["embeddings"]
+            with open(base + ".json", encoding="utf-8") as f:
+                replies = json.load(f)
+        except (OSError, ValueError, KeyError):
+            embeddings, replies = None, []
+        _semantic_cache[assistant_id] = (embeddings, replies)
+    return _semantic_cache[assistant_id]
+
+
+def _cache_get_exact(key: str):
+    with _cache_lock:
+        try:
+            with shelve.open(os.path.join(CACHE_DIR, "exact"), flag="r") as db:
+                return db.get(key)
+        except Exception:
+            return None  # no cache file yet
+
+
+def _cache_get_similar(assistant_id: str, embedding: np.ndarray):
+    with _cache_lock:
+        embeddings, replies = _load_semantic(assistant_id)
+        if embeddings is None or not replies:
+            return None
+        similarities = embeddings @ embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] > CACHE_SIMILARITY:
+            return replies[best]
+    return None
+
+
+def _cache_store(assistant_id: str, key: str, embedding, reply: str):
+    """Best effort: an unwritable CACHE_DIR must not fail a paid-for reply."""
+    try:
+        with _cache_lock:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with shelve.open(os.path.join(CACHE_DIR, "exact")) as db:
+                db[key] = reply
+            if embedding is None:
+                return
+            embeddings, replies = _load_semantic(assistant_id)
+            embeddings = embedding[None, :] if embeddings is None else np.vstack([embeddings, embedding])
+            replies = replies + [reply]
+            _semantic_cache[assistant_id] = (embeddings, replies)
+            base = os.path.join(CACHE_DIR, assistant_id)
+            np.savez(base + ".npz", embeddings=embeddings)
+            with open(base + ".json", "w", encoding="utf-8") as f:
+                json.dump(replies, f)
+    except Exception as e:
+        print(f"[WARN] Response cache store failed: {e}")
+
+
+def _embedding_vector(response) -> np.ndarray:
+    return _normalize(response.data[0].embedding)
+
+
+def _cache_lookup(assistant_id: str, conversation_history: str, semantic: bool):
+    """
+    Blocking cache lookup shared by both wrappers: exact tier, then (if
+    semantic) the embedding tier. Returns (reply or None, key, embedding);
+    key and embedding are what _cache_store needs after a miss.
+    """
+    key = _exact_key(assistant_id, conversation_history)
+    reply = _cache_get_exact(key)
+    if reply is not None or not semantic:
+        return reply, key, None
+    try:
+        resp = client.embeddings.create(model=EMBEDDING_MODEL, input=conversation_history)
+        embedding = _embedding_vector(resp)
+        reply = _cache_get_similar(assistant_id, embedding)
+    except Exception as e:
+        print(f"[WARN] Semantic cache lookup failed: {e}")
+        return None, key, None
+    if reply is not None:
+        _cache_store(assistant_id, key, None, reply)
+    return reply, key, embedding
+
+
+def cached_assistant(func):
+    """
+    Cache an ask_assistant-style function (sync or async) on
+    (assistant_id, conversation_history): exact match first, then semantic.
+    Pass semantic=False where a near-identical prompt can need a different
+    answer (vote prompts, the clerk's tally): those use the exact tier only.
+    The async version runs the cache I/O in a worker thread, off the event loop.
+    """
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(assistant_id, conversation_history, *args, semantic=True, **kwargs):
+            if not CACHE_ENABLED:
+                return await func(assistant_id, conversation_history, *args, **kwargs)
+            reply, key, embedding = await asyncio.to_thread(
+                _cache_lookup, assistant_id, conversation_history, semantic)
+            if reply is not None:
+                return reply
+            reply = await func(assistant_id, conversation_history, *args, **kwargs)
+            await asyncio.to_thread(_cache_store, assistant_id, key, embedding, reply)
+            return reply
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(assistant_id, conversation_history, *args, semantic=True, **kwargs):
+        if not CACHE_ENABLED:
+            return func(assistant_id, conversation_history, *args, **kwargs)
+        reply, key, embedding = _cache_lookup(assistant_id, conversation_history, semantic)
+        if reply is not None:
+            return reply
+        reply = func(assistant_id, conversation_history, *args, **kwargs)
+        _cache_store(assistant_id, key, embedding, reply)
+        return reply
+    return wrapper
+
 
 # --- Core helpers ---
-def ask_assistant(assistant_id: str, conversation_history: str, name: str) -> str:
-    thread = client.beta.threads.create()
-    client.beta.threads.messages.create(
-        thread_id=thread.id,
-        role="user",
-        content=conversation_history
-    )
+def _thread_delta(thread: dict, conversation_history: str) -> str:
+    """Return the part of conversation_history this thread has not seen yet."""
+    sent = thread["sent"]
+    if sent and conversation_history.startswith(sent):
+        return conversation_history[len(sent):]
+    return conversation_history
+
+
+@cached_assistant
+def ask_assistant(assistant_id: str, conversation_history: str, name: str, threads: dict) -> str:
+    """
+    Ask an assistant on the run's thread for `name` (threads = Parliament.threads).
+    Each actor keeps one thread per parliament run, so only the new part of
+    the conversation is uploaded and the thread prefix stays stable.
+    """
+    if name not in threads:
+        threads[name] = {"id": client.beta.threads.create().id, "sent": ""}
+    thread = threads[name]
+
+    delta = _thread_delta(thread, conversation_history)
+    if delta:
+        client.beta.threads.messages.create(
+            thread_id=thread["id"],
+            role="user",
+            content=delta
+        )
+    thread["sent"] = conversation_history
     client.beta.threads.runs.create_and_poll(
-        thread_id=thread.id,
+        thread_id=thread["id"],
+        assistant_id=assistant_id,
+    )
+    # Only the newest message (the reply) is needed, not the whole transcript
+    messages = client.beta.threads.messages.list(thread_id=thread["id"], limit=1, order="desc")
+    return messages.data[0].content[0].text.value
+
+
+@cached_assistant
+async def ask_assistant_async(assistant_id: str, conversation_history: str, name: str, threads: dict) -> str:
+    """Same as ask_assistant, but awaitable so several actors can think at once."""
+    if name not in threads:
+        threads[name] = {"id": (await aclient.beta.threads.create()).id, "sent": ""}
+    thread = threads[name]
+
+    delta = _thread_delta(thread, conversation_history)
+    if delta:
+        await aclient.beta.threads.messages.create(
+            thread_id=thread["id"],
+            role="user",
+            content=delta
+        )
+    thread["sent"] = conversation_history
+    await aclient.beta.threads.runs.create_and_poll(
+        thread_id=thread["id"],
         assistant_id=assistant_id,
     )
-    messages = client.beta.threads.messages.list(thread_id=thread.id)
+    messages = await aclient.beta.threads.messages.list(thread_id=thread["id"], limit=1, order="desc")
     return messages.data[0].content[0].text.value
 
 
-def send_to_clerk(conversation: str, votes: dict) -> str:
+DRAMA_RETRIES = 3
+_drama_q = queue.Queue()
+
+
+def _drama_worker():
+    """Deliver queued dramatization updates in order, retrying with backoff."""
+    while True:
+        path, payload, name = _drama_q.get()
+        delay = 0.5
+        for attempt in range(1, DRAMA_RETRIES + 1):
+            try:
+                DRAMA_SESSION.post(f"{DRAMA_SERVER_URL}{path}", json=payload, timeout=5)
+                break
+            except Exception as e:
+                if attempt == DRAMA_RETRIES:
+                    # Don't crash parliament if dramatization server is down
+                    print(f"[WARN] Failed to send {path.lstrip('/')} to dramatization server for {name}: {e}")
+                else:
+                    time.sleep(delay)
+                    delay *= 2
+        _drama_q.task_done()
+
+
+threading.Thread(target=_drama_worker, daemon=True).start()
+
+
+def post_to_drama(path: str, payload: dict, name: str):
+    """Queue a POST to the dramatization server; returns immediately."""
+    _drama_q.put((path, payload, name))
+
+
+async def send_to_clerk(p: Parliament) -> str:
     """Send full voting table to clerk; return summary."""
     message = "Here is how everyone voted.\n\n=== Votes ===\n"
-    for participant, vote in votes.items():
+    for participant, vote in p.votes.items():
         message += f"{participant}: {vote}\n"
 
-    return ask_assistant(clerk, message, "clerk")
+    return await ask_assistant_async(clerk, message, "clerk", p.threads, semantic=False)
 
 
-def get_proposal_from_assistant(proposer: str) -> str:
+def get_proposal_from_assistant(proposer: str, threads: dict) -> str:
     """Generate proposal if proposer is non-human."""
-    asst_id = ASSISTANTS[proposer]
+    asst_id = PARTICIPANTS[proposer]
     prompt = (
         'Make a proposal and present it in the Convivial Commons Congress. '
         'Aim for ≤150 words. Write as a continuous short speech, following this order: '
@@ -73,92 +331,99 @@ def get_proposal_from_assistant(proposer: str) -> str:
         'WHY. Steps required. BENEFITS. RISKS / TRADE-OFFS. COST ESTIMATE in ₹ or ecosystem values. '
         'Rules: One concrete idea, no abbreviations, buildable actions, from non-human goals.'
     )
-    return ask_assistant(asst_id, prompt, proposer)
+    return ask_assistant(asst_id, prompt, proposer, threads)
 
 
 # --- Discussion round ---
-def run_discussion(participants: list):
-    """Run a full discussion round (AI only)."""
-    for name in participants:
-        if name == "human":
-            continue  # human never participates in discussion
-
-        asst_id = ASSISTANTS[name]
-        reply = ask_assistant(asst_id, STATE["conversation"], name)
-        STATE["discussion"]["responses"][name] = reply
-        STATE["conversation"] += f"\n{name} said:\n{reply}\n"
-
-        # Tell the dramatization server as soon as we have this actor's text
-        try:
-            payload = {"actor": name, "text": reply}
-            requests.post(f"{DRAMA_SERVER_URL}/actor_text", json=payload, timeout=5)
-        except Exception as e:
-            # Don't crash parliament if dramatization server is down
-            print(f"[WARN] Failed to send actor_text to dramatization server for {name}: {e}")
+async def run_discussion(p: Parliament, participants: list):
+    """Run a full discussion round (AI only).
+
+    All actors answer the same conversation concurrently; replies are then
+    appended in participant order so the transcript stays deterministic.
+    """
+    actors = [n for n in participants if n != "human"]  # human never participates in discussion
+
+    base_conv = p.conversation
+    tasks = [ask_assistant_async(PARTICIPANTS[n], base_conv, n, p.threads) for n in actors]
+    replies = await asyncio.gather(*tasks)
+
+    for name, reply in zip(actors, replies):
+        p.responses[name] = reply
+        p.conversation += f"\n{name} said:\n{reply}\n"
 
-    STATE["discussion"]["done"] = True
-    STATE["phase"] = "voting"
+    # Tell the dramatization server about every actor's text in one request
+    post_to_drama("/actor_texts", {"texts": dict(zip(actors, replies))}, ", ".join(actors))
+
+    p.discussion_done = True
+    p.phase = "voting"
 
     return {
         "status": "discussion_complete",
         "phase": "voting",
-        "responses": STATE["discussion"]["responses"],
-        "votes": STATE["voting"]["votes"],
-        "conversation": STATE["conversation"],
+        "responses": p.responses,
+        "votes": p.votes,
+        "conversation": p.conversation,
     }
 
 
 # --- Voting round ---
-def run_voting(participants: list):
-    """Run a full voting round (AI only)."""
-    for name in participants:
-        if name == "human":
-            continue  # human never votes
-
-        asst_id = ASSISTANTS[name]
-        vote_prompt = (
-            STATE["conversation"]
-            + "\nNow cast your vote on the proposal: reply with YES or NO in one short sentence."
-        )
-        vote_reply = ask_assistant(asst_id, vote_prompt, name)
-        STATE["voting"]["votes"][name] = vote_reply
-        STATE["conversation"] += f"\n{name} voted:\n{vote_reply}\n"
+VOTE_SUFFIX = "\nNow cast your vote on the proposal: reply with YES or NO in one short sentence."
 
-        # NEW: send vote to dramatization server
-        try:
-            payload = {"actor": name, "vote": vote_reply}
-            requests.post(f"{DRAMA_SERVER_URL}/actor_vote", json=payload, timeout=5)
-        except Exception as e:
-            print(f"[WARN] Failed to send actor_vote to dramatization server for {name}: {e}")
 
-    STATE["voting"]["done"] = True
-    STATE["phase"] = "voting"
+async def run_voting(p: Parliament, participants: list):
+    """Run a full voting round (AI only).
+
+    Every voter sees the same post-discussion conversation, so all votes are
+    requested at once and appended afterwards in participant order.
+    """
+    voters = [n for n in participants if n != "human"]  # human never votes
+
+    base_conv = p.conversation
+    votes = await asyncio.gather(*[
+        ask_assistant_async(PARTICIPANTS[n], base_conv + VOTE_SUFFIX, n, p.threads, semantic=False)
+        for n in voters
+    ])
+
+    for name, vote_reply in zip(voters, votes):
+        p.votes[name] = vote_reply
+        p.conversation += f"\n{name} voted:\n{vote_reply}\n"
+
+    # Send all votes to the dramatization server in one request
+    post_to_drama("/actor_vote", {"votes": dict(zip(voters, votes))}, ", ".join(voters))
 
-    clerk_summary = send_to_clerk(STATE["conversation"], STATE["voting"]["votes"])
+    p.voting_done = True
+    p.phase = "voting"
+
+    p.clerk_summary = await send_to_clerk(p)
 
     return {
         "status": "complete",
         "phase": "voting",
-        "responses": STATE["discussion"]["responses"],
-        "votes": STATE["voting"]["votes"],
-        "conversation": STATE["conversation"],
-        "clerk_summary": clerk_summary,
+        "responses": p.responses,
+        "votes": p.votes,
+        "conversation": p.conversation,
+        "clerk_summary": p.clerk_summary,
     }
 
 
 # --- Orchestrator ---
-def start_full_parliament(participants: list):
+async def start_full_parliament(p: Parliament, participants: list):
     """Run discussion → voting with no human input."""
-    _ = run_discussion(participants)
+    _ = await run_discussion(p, participants)
 
     # Voting order = all AIs except proposer + proposer last (if not human)
-    voting_participants = [
-        n for n in ASSISTANTS if n != STATE["proposer"] and n != "human"
-    ]
-    if STATE["proposer"] != "human":
-        voting_participants.append(STATE["proposer"])
+    voting_participants = [n for n in AI_ACTORS if n != p.proposer]
+    if p.proposer != "human":
+        voting_participants.append(p.proposer)
+
+    return await run_voting(p, voting_participants)
 
-    return run_voting(voting_participants)
+
+def _register(p: Parliament):
+    with _parliaments_lock:
+        PARLIAMENTS[p.id] = p
+        while len(PARLIAMENTS) > PARLIAMENT_HISTORY:
+            PARLIAMENTS.pop(next(iter(PARLIAMENTS)))
 
 
 # --- Routes ---
@@ -173,6 +438,9 @@ def parliament_start():
       "proposer": "human" | "lake" | ...,
       "order": ["lake", "fungi", ...]  # optional order of AI characters for discussion
     }
+    The response includes "id", usable with GET /parliament/<id>. This call
+    blocks until the whole run (discussion, voting, clerk) has finished, so
+    the id only reaches the caller then; GET is for re-reading a past run.
     """
     data = request.get_json(force=True)
     proposal = data.get("proposal", "")
@@ -183,59 +451,73 @@ def parliament_start():
     if proposer == "human" and not proposal:
         return jsonify({"error": "Proposal required when proposer is human"}), 400
 
-    # Non-human proposers must exist in ASSISTANTS
-    if proposer != "human" and proposer not in ASSISTANTS:
+    # Non-human proposers must be one of the AI actors
+    if proposer != "human" and proposer not in AI_ACTORS:
         return jsonify({"error": f"Invalid proposer '{proposer}'"}), 400
 
-    # Auto-generate proposal for non-human proposers
-    if proposer != "human" and not proposal:
-        proposal = get_proposal_from_assistant(proposer)
-
     # Determine actors_order (non-human characters) if provided
     actors_order = []
     if isinstance(order, list) and order:
         # Clean + validate provided order
         for name in order:
-            if name in ASSISTANTS and name != "human":
+            if name in AI_ACTORS:
                 actors_order.append(name)
     if not actors_order:
         # Fallback default order = all non-human participants in dict order
-        actors_order = [n for n in ASSISTANTS.keys() if n != "human"]
+        actors_order = list(AI_ACTORS)
 
-    # Reset state
-    STATE["proposal"] = proposal
-    STATE["proposer"] = proposer
-    STATE["conversation"] = f"The proposal is from {proposer}:\n{proposal}\n\n"
-    STATE["discussion"] = {"responses": {}, "done": False}
-    STATE["voting"] = {"votes": {}, "done": False}
-    STATE["phase"] = "discussion"
-    STATE["actors_order"] = actors_order  # store for reference / debugging
+    # Fresh state for this run (the proposer's thread is created here if needed)
+    p = Parliament(proposal=proposal, proposer=proposer, actors_order=actors_order)
+    _register(p)
+
+    # Auto-generate proposal for non-human proposers
+    if proposer != "human" and not proposal:
+        p.proposal = get_proposal_from_assistant(proposer, p.threads)
+
+    p.conversation = f"The proposal is from {proposer}:\n{p.proposal}\n\n"
 
     # Discussion participants = exactly the actor order provided / derived
     participants = actors_order[:]
 
-    result = start_full_parliament(participants)
+    result = run_async(start_full_parliament(p, participants))
     return jsonify({
-        "proposal": proposal,
+        "id": p.id,
+        "proposal": p.proposal,
         "proposer": proposer,
         "order": actors_order,  # echo back the order being used
         **result
     })
 
 
+@app.route("/parliament/<parliament_id>", methods=["GET"])
+def parliament_status(parliament_id):
+    with _parliaments_lock:
+        p = PARLIAMENTS.get(parliament_id)
+    if p is None:
+        return jsonify({"error": f"Unknown parliament '{parliament_id}'"}), 404
+    return jsonify({
+        "id": p.id,
+        "proposal": p.proposal,
+        "proposer": p.proposer,
+        "order": p.actors_order,
+        "phase": p.phase,
+        "discussion_done": p.discussion_done,
+        "voting_done": p.voting_done,
+        "responses": p.responses,
+        "votes": p.votes,
+        "conversation": p.conversation,
+        "clerk_summary": p.clerk_summary,
+    })
+
+
 @app.route("/reset", methods=["POST"])
 def reset_state():
-    STATE.update({
-        "proposal": "",
-        "proposer": "",
-        "conversation": "",
-        "discussion": {"responses": {}, "done": False},
-        "voting": {"votes": {}, "done": False},
-        "phase": "discussion",
-        "actors_order": [],
-    })
+    """Forget all finished/running parliaments (runs in progress keep their own state)."""
+    with _parliaments_lock:
+        PARLIAMENTS.clear()
     return jsonify({"status": "reset_ok"})
 
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=8000, debug=True)
\ No newline at end of file
+    from serve import serve_app
+    serve_app(app, port=8000)
\ No newline at end of file
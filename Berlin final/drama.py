@@ -1,23 +1,56 @@
 from flask import Flask, request, jsonify
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
 import threading
 import time
 import requests
+from requests.adapters import HTTPAdapter
 import socket
+import struct
+import sys
 
-from escpos.printer import Usb
+from escpos.printer import Dummy, Usb
 
 app = Flask(__name__)
 
+# =========================
+# LOGGING
+# =========================
+
+# Threads only enqueue log records; one listener thread writes them out, so
+# the DMX sender, drama loop and request handlers never block on stdout.
+_log_q = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_q, logging.StreamHandler(sys.stdout))
+_log_listener.start()
+atexit.register(_log_listener.stop)  # flush what is still queued on exit
+
+log = logging.getLogger("drama")
+log.addHandler(logging.handlers.QueueHandler(_log_q))
+log.setLevel(logging.INFO)
+log.propagate = False
+
 # =========================
 # CONFIG
 # =========================
 
 AI_SERVER_BASE_URL = "http://localhost:8000"  # your AI/parliament server
+AI_SERVER_TIMEOUT = (3, 30)  # (connect, read) seconds: fail fast if the AI server is down
 
 ARTNET_PORT = 6454
+# Set DMX_BROADCAST_IP (e.g. 192.168.1.255) to skip broadcast auto-detection
+# Set DMX_IFACE (e.g. eth1) to pin Art-Net to that interface (Linux only);
+# by default the socket is pinned only to an interface whose broadcast
+# address is exactly the target, otherwise the kernel's routing decides
 ARTNET_UNIVERSE = 0  # first universe
 DMX_UNIVERSE_SIZE = 512
-DMX_FPS = 30  # how often to send Art-Net frames
+DMX_FPS = 30  # max Art-Net frames per second while DMX values are changing
+DMX_KEEPALIVE_INTERVAL = 1.0  # seconds between refresh frames when nothing changes
+DMX_SNDBUF_BYTES = 4 * 1024 * 1024  # kernel send buffer for the Art-Net socket
+DMX_IP_TOS = 0xB8  # DSCP EF (46): ask switches / Wi-Fi APs to prioritise DMX frames
+DMX_RT_PRIORITY = 50  # SCHED_FIFO priority of the sender thread on the Pi (1-99)
 
 # Default order of characters (can be overridden by /start payload)
 DEFAULT_ACTORS_ORDER = ["rain", "fungi", "bee", "fox", "tree"]
@@ -32,6 +65,7 @@ ACTOR_CONFIG = {
 }
 
 MIN_SLOT_DURATION = 10.0  # seconds per character minimum (used for discussion AND voting)
+TEXT_BATCH_WINDOW = 0.05  # seconds; actor texts arriving within this window are applied together
 
 # === THERMAL PRINTER CONFIG (USB ESC/POS) ===
 # Replace these with your printer IDs from `lsusb` on Pi
@@ -53,12 +87,12 @@ DEBUG = True
 def get_local_ip():
     ip = "127.0.0.1"
     try:
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.connect(("8.8.8.8", 80))
-        ip = s.getsockname()[0]
-        s.close()
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.settimeout(0.2)  # fail fast on a misconfigured / offline network stack
+            s.connect(("8.8.8.8", 80))
+            ip = s.getsockname()[0]
     except Exception as e:
-        print("[DMX][WARN] Could not auto-detect local IP, using 127.0.0.1:", e)
+        log.warning("[DMX][WARN] Could not auto-detect local IP, using 127.0.0.1: %s", e)
     return ip
 
 
@@ -68,22 +102,55 @@ def auto_detect_broadcast_ip():
         parts = local_ip.split(".")
         if len(parts) == 4:
             broadcast_ip = ".".join(parts[:3] + ["255"])
-            print(f"[DMX] Auto-detected broadcast IP: {broadcast_ip} (from local IP {local_ip})")
+            log.info("[DMX] Auto-detected broadcast IP: %s (from local IP %s)", broadcast_ip, local_ip)
             return broadcast_ip
     except Exception as e:
-        print("[DMX][WARN] Failed to compute broadcast from local IP:", e)
+        log.warning("[DMX][WARN] Failed to compute broadcast from local IP: %s", e)
 
-    print("[DMX][WARN] Falling back to broadcast 255.255.255.255")
+    log.warning("[DMX][WARN] Falling back to broadcast 255.255.255.255")
     return "255.255.255.255"
 
 
+_SIOCGIFBRDADDR = 0x8919  # Linux ioctl: IPv4 broadcast address of an interface
+
+
+def get_iface_for_broadcast(broadcast_ip):
+    """Name of the interface whose broadcast address is 'broadcast_ip', or None (always None off Linux)."""
+    try:
+        import fcntl
+    except ImportError:  # Windows
+        return None
+    for _, name in socket.if_nameindex():
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+                ifreq = fcntl.ioctl(s.fileno(), _SIOCGIFBRDADDR, struct.pack("256s", name.encode()[:15]))
+        except OSError:
+            continue  # interface has no IPv4 broadcast address (e.g. lo)
+        if socket.inet_ntoa(ifreq[20:24]) == broadcast_ip:
+            return name
+    return None
+
+
 # =========================
 # DMX CONTROLLER
 # =========================
 
+# Art-Net OpDmx header. The OpCode is little-endian; ProtVer and Length are
+# big-endian; SubUni/Net are the low/high bytes of the universe.
+ARTNET_ID = b"Art-Net\x00"
+ARTNET_OP_DMX = 0x5000
+ARTNET_PROT_VER = 14
+# ID, OpCode and ProtVer never change, so those 12 bytes are packed once here
+_ARTNET_HEADER = struct.pack("<8sH", ARTNET_ID, ARTNET_OP_DMX) + struct.pack(">H", ARTNET_PROT_VER)
+_ARTNET_DMX_FIELDS = struct.Struct(">BBBBH")      # Sequence, Physical, SubUni, Net, Length
+_ARTNET_HEADER_LEN = len(_ARTNET_HEADER) + _ARTNET_DMX_FIELDS.size  # 18
+
+
 class DMXController:
     """
-    DMX controller with continuous sending loop over Art-Net (broadcast).
+    DMX controller sending Art-Net (broadcast) from a background thread.
+    A frame goes out as soon as the buffer changes (at most fps per second),
+    plus a keepalive frame every DMX_KEEPALIVE_INTERVAL when idle.
     """
 
     def __init__(
@@ -92,61 +159,165 @@ class DMXController:
         fps=DMX_FPS,
         universe=ARTNET_UNIVERSE,
     ):
-        self.buffer = [0] * universe_size
+        self.buffer = bytearray(universe_size)
+        self._zeros = bytes(universe_size)  # blackout template, same length as buffer
         self.lock = threading.Lock()
+        self._dirty = threading.Event()  # set whenever buffer changes; wakes the sender
         self.fps = fps
         self.running = True
 
         self.universe = universe
-        self.target_ip = auto_detect_broadcast_ip()
+        self.target_ip = os.environ.get("DMX_BROADCAST_IP") or auto_detect_broadcast_ip()
         self.port = ARTNET_PORT
 
-        # UDP socket with broadcast enabled
+        # UDP socket with broadcast enabled. Art-Net is fire-and-forget, so the
+        # socket is non-blocking: a full send buffer drops a frame, never stalls.
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        for level, opt, value in (
+            (socket.SOL_SOCKET, socket.SO_SNDBUF, DMX_SNDBUF_BYTES),
+            (socket.IPPROTO_IP, socket.IP_TOS, DMX_IP_TOS),
+        ):
+            try:
+                self.sock.setsockopt(level, opt, value)
+            except OSError as e:
+                log.warning("[DMX][WARN] Could not set socket option: %s", e)
+        self._bind_to_iface()
+        self.sock.setblocking(False)
+
+        # The destination never changes: connect once so each frame is a plain
+        # send() with no per-call address parsing or route lookup.
+        self._addr = (self.target_ip, self.port)
+        try:
+            self.sock.connect(self._addr)
+            self._connected = True
+        except OSError as e:
+            log.warning("[DMX][WARN] Could not connect UDP socket, falling back to sendto: %s", e)
+            self._connected = False
+
+        # Universe and size are fixed, so the header is written once, in place;
+        # each frame only copies the DMX bytes into the packet after it.
+        self._packet = bytearray(_ARTNET_HEADER_LEN + universe_size)
+        self._write_artnet_header(universe_size)
+        # Fixed-size views: the send path never allocates or resizes
+        self._packet_view = memoryview(self._packet)
+        self._payload_view = self._packet_view[_ARTNET_HEADER_LEN:]
 
         self.thread = threading.Thread(target=self._send_loop, daemon=True)
         self.thread.start()
 
-    def _build_artnet_packet(self, dmx_data: bytes) -> bytes:
-        packet = bytearray()
-        packet.extend(b"Art-Net\x00")
-        packet.extend((0x00, 0x50))      # OpDmx
-        packet.extend((0x00, 14))        # ProtVer
-        packet.append(0x00)              # Sequence
-        packet.append(0x00)              # Physical
-        packet.append(self.universe & 0xFF)
-        packet.append((self.universe >> 8) & 0xFF)
-        length = len(dmx_data)
-        packet.append((length >> 8) & 0xFF)
-        packet.append(length & 0xFF)
-        packet.extend(dmx_data)
-        return bytes(packet)
+    def _bind_to_iface(self):
+        """
+        Pin the socket to one interface (SO_BINDTODEVICE) so the kernel skips
+        the route lookup per send. Only done for DMX_IFACE, or for the
+        interface whose broadcast address is exactly target_ip; anything else
+        (unicast targets, a non-matching broadcast) is left to routing, which
+        knows better than the default-route interface.
+        """
+        if not hasattr(socket, "SO_BINDTODEVICE"):
+            return
+        iface = os.environ.get("DMX_IFACE") or get_iface_for_broadcast(self.target_ip)
+        if not iface:
+            return
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_BINDTODEVICE, iface.encode())
+            log.info("[DMX] Art-Net socket bound to interface %s", iface)
+        except OSError as e:  # needs CAP_NET_RAW on older kernels
+            log.warning("[DMX][WARN] Could not bind Art-Net socket to %s: %s", iface, e)
+
+    def _write_artnet_header(self, length: int) -> None:
+        self._packet[:len(_ARTNET_HEADER)] = _ARTNET_HEADER
+        _ARTNET_DMX_FIELDS.pack_into(
+            self._packet, len(_ARTNET_HEADER),
+            0x00,                          # Sequence
+            0x00,                          # Physical
+            self.universe & 0xFF,          # SubUni
+            (self.universe >> 8) & 0xFF,   # Net
+            length,
+        )
+
+    def _raise_thread_priority(self):
+        """
+        Raspberry Pi only (Linux, DEBUG off): pin the sender thread to the last
+        CPU core and give it real-time SCHED_FIFO priority, so Flask and the
+        drama thread can't delay frames. Both calls act on the calling thread.
+        """
+        if DEBUG or not sys.platform.startswith("linux"):
+            return
+        try:
+            cpus = os.sched_getaffinity(0)
+            if len(cpus) > 1:
+                os.sched_setaffinity(0, {max(cpus)})
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(DMX_RT_PRIORITY))
+            log.info("[DMX] Sender thread on CPU %d with SCHED_FIFO priority %d",
+                     max(cpus), DMX_RT_PRIORITY)
+        except (AttributeError, OSError) as e:  # SCHED_FIFO needs root / CAP_SYS_NICE
+            log.warning("[DMX][WARN] Could not raise sender thread priority: %s", e)
 
     def _send_loop(self):
-        interval = 1.0 / self.fps
+        self._raise_thread_priority()
+        min_gap = 1.0 / self.fps
+        last_send_t = float("-inf")
         while self.running:
-            with self.lock:
-                frame = bytes(self.buffer)
+            # Sleep until something changes, or until the keepalive is due
+            if self._dirty.wait(timeout=DMX_KEEPALIVE_INTERVAL):
+                # Never exceed fps; changes made while we wait go out in one frame
+                gap = time.monotonic() - last_send_t
+                if gap < min_gap:
+                    time.sleep(min_gap - gap)
+
+                self._dirty.clear()  # before the copy, so later changes re-trigger
+                with self.lock:
+                    self._payload_view[:] = self.buffer  # memcpy into the packet
+            # else: keepalive, the packet already holds the current buffer
+            last_send_t = time.monotonic()
             try:
-                artnet_packet = self._build_artnet_packet(frame)
-                self.sock.sendto(artnet_packet, (self.target_ip, self.port))
+                if self._connected:
+                    self.sock.send(self._packet_view)
+                else:
+                    self.sock.sendto(self._packet_view, self._addr)
+            except BlockingIOError:
+                pass  # send buffer full: drop this frame, the next one follows
+            except ConnectionRefusedError:
+                pass  # ICMP from a unicast target with no listener; keep sending
             except Exception as e:
-                print("[DMX][WARN] Failed to send Art-Net packet:", e)
-            time.sleep(interval)
+                log.warning("[DMX][WARN] Failed to send Art-Net packet: %s", e)
 
     def set_channel(self, channel, value):
         if channel < 1 or channel > len(self.buffer):
             return
+        value = int(value)
+        value = 0 if value < 0 else 255 if value > 255 else value
         with self.lock:
-            self.buffer[channel - 1] = max(0, min(255, value))
+            self.buffer[channel - 1] = value  # single byte store into the bytearray
+        self._dirty.set()
+
+    def set_channels(self, updates, reset=False):
+        """
+        Apply {channel: value} in one critical section, so the sender never sees
+        a half-applied scene. reset=True zeroes all other channels first.
+        """
+        n = len(self.buffer)
+        clamped = []
+        for ch, v in updates.items():
+            if 1 <= ch <= n:
+                v = int(v)
+                clamped.append((ch - 1, 0 if v < 0 else 255 if v > 255 else v))
+        with self.lock:
+            if reset:
+                self.buffer[:] = self._zeros
+            for i, v in clamped:
+                self.buffer[i] = v
+        self._dirty.set()
 
     def blackout(self):
         with self.lock:
-            self.buffer = [0] * len(self.buffer)
+            self.buffer[:] = self._zeros
+        self._dirty.set()
 
     def stop(self):
         self.running = False
+        self._dirty.set()  # wake the sender so it exits now
         try:
             self.thread.join()
         except RuntimeError:
@@ -179,18 +350,18 @@ class ThermalPrinter:
         self.printer = None
 
         if DEBUG:
-            print("[PRINTER] DEBUG mode ON → assuming Windows USB printer")
+            log.info("[PRINTER] DEBUG mode ON → assuming Windows USB printer")
             self._open_windows_printer()
         else:
-            print("[PRINTER] DEBUG mode OFF → assuming Raspberry Pi USB printer")
+            log.info("[PRINTER] DEBUG mode OFF → assuming Raspberry Pi USB printer")
             self._open_linux_printer()
 
     def _open_windows_printer(self):
         try:
             self.printer = Usb(self.vid, self.pid, encoding="utf-8")
-            print(f"[PRINTER] Connected (Windows mode) VID=0x{self.vid:04x} PID=0x{self.pid:04x}")
+            log.info("[PRINTER] Connected (Windows mode) VID=0x%04x PID=0x%04x", self.vid, self.pid)
         except Exception as e:
-            print("[PRINTER][ERROR] Could not open printer in Windows mode:", e)
+            log.error("[PRINTER][ERROR] Could not open printer in Windows mode: %s", e)
             self.printer = None
 
     def _open_linux_printer(self):
@@ -200,17 +371,18 @@ class ThermalPrinter:
                                in_ep=self.in_ep,
                                out_ep=self.out_ep,
                                encoding="utf-8")
-            print(f"[PRINTER] Connected (Raspberry Pi mode) "
-                  f"VID=0x{self.vid:04x} PID=0x{self.pid:04x} EP_IN=0x{self.in_ep:02x} EP_OUT=0x{self.out_ep:02x}")
+            log.info("[PRINTER] Connected (Raspberry Pi mode) "
+                     "VID=0x%04x PID=0x%04x EP_IN=0x%02x EP_OUT=0x%02x",
+                     self.vid, self.pid, self.in_ep, self.out_ep)
         except Exception as e:
-            print("[PRINTER][ERROR] Could not open printer in Raspberry Pi mode:", e)
+            log.error("[PRINTER][ERROR] Could not open printer in Raspberry Pi mode: %s", e)
             self.printer = None
 
     def _ensure_printer(self):
         if self.printer is not None:
             return True
 
-        print("[PRINTER] Attempting reconnect...")
+        log.info("[PRINTER] Attempting reconnect...")
         if DEBUG:
             self._open_windows_printer()
         else:
@@ -226,24 +398,49 @@ class ThermalPrinter:
         header = f"— {actor.upper()} —\n"
 
         if not self._ensure_printer():
-            print("[PRINTER][FALLBACK]", repr(header + text))
+            log.info("[PRINTER][FALLBACK] %r", header + text)
             return
 
+        # Render the whole ticket (codepage switches, text, cut) into memory
+        # first, then send it as one USB write instead of one per command.
+        ticket = Dummy()
+        ticket.text("\n" + header + text + "\n\n")
+        ticket.cut()
+
         try:
-            self.printer.text("\n")
-            self.printer.text(header)
-            self.printer.text(text)
-            self.printer.text("\n\n")
-            self.printer.cut()
-            print(f"[PRINTER] Printed for {actor}")
+            self.printer._raw(ticket.output)
+            log.info("[PRINTER] Printed for %s", actor)
         except Exception as e:
-            print("[PRINTER][ERROR] Failed during print:", e)
+            log.error("[PRINTER][ERROR] Failed during print: %s", e)
             self.printer = None
 
 
 dmx = DMXController()
 printer = ThermalPrinter()
 
+# Keep-alive session to the AI server, reused by every run's kick-off
+AI_SESSION = requests.Session()
+AI_SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+atexit.register(AI_SESSION.close)
+
+# The printer is not thread-safe and USB writes can take seconds, so all
+# printing goes through this queue and exactly one worker thread (FIFO order).
+_print_q = queue.Queue()
+
+
+def _printer_worker():
+    while True:
+        actor, text = _print_q.get()
+        try:
+            printer.print_text(actor, text)
+        except Exception as e:
+            log.error("[PRINTER][ERROR] Print job failed: %s", e)
+        finally:
+            _print_q.task_done()
+
+
+threading.Thread(target=_printer_worker, daemon=True).start()
+
 
 # =========================
 # DRAMA STATE MACHINE
@@ -258,14 +455,20 @@ DRAMA_STATE = {
             "text": None,
             "start_time": None,
             "printed": False,
+            "event": threading.Event(),  # set once "text" has arrived
         }
         for actor in DEFAULT_ACTORS_ORDER
     },
     "votes": {},           # actor -> vote text
+    "votes_event": threading.Event(),  # set whenever a vote arrives
     "voting_done": False,
+    "version": 0,          # bumped (under lock) on every change /status reports
     "lock": threading.Lock(),
 }
 
+# (version, JSON bytes) of the last /status body; rebuilt only when version moves
+_status_cache = (None, b"")
+
 
 def _init_actor_data(actors_order):
     return {
@@ -273,11 +476,50 @@ def _init_actor_data(actors_order):
             "text": None,
             "start_time": None,
             "printed": False,
+            "event": threading.Event(),  # set once "text" has arrived
         }
         for actor in actors_order
     }
 
 
+# Incoming actor texts are queued by the HTTP handlers and applied by one
+# flusher thread: a burst of texts costs one critical section and one wake-up.
+_pending_texts = []
+_pending_lock = threading.Lock()
+_texts_pending = threading.Event()
+
+
+def _queue_texts(items):
+    with _pending_lock:
+        _pending_texts.extend(items)
+        _texts_pending.set()
+
+
+def _text_flusher():
+    while True:
+        _texts_pending.wait()
+        time.sleep(TEXT_BATCH_WINDOW)  # let the rest of the burst arrive
+        with _pending_lock:
+            batch = list(_pending_texts)
+            _pending_texts.clear()
+            _texts_pending.clear()
+
+        arrived = []
+        with DRAMA_STATE["lock"]:
+            for actor, text in batch:
+                entry = DRAMA_STATE["actor_data"].get(actor)
+                if entry is not None:  # run may have been reset meanwhile
+                    entry["text"] = text
+                    arrived.append(entry["event"])
+            if arrived:
+                DRAMA_STATE["version"] += 1
+        for event in arrived:
+            event.set()
+
+
+threading.Thread(target=_text_flusher, daemon=True).start()
+
+
 def _set_idle_scene():
     """Idle DMX look: everything off for now."""
     dmx.blackout()
@@ -287,17 +529,16 @@ def _set_active_actor_scene(actor):
     """
     Discussion DMX: this actor is 'on stage'.
     """
-    _set_idle_scene()
     cfg = ACTOR_CONFIG.get(actor)
     if not cfg:
-        print(f"[WARN] No DMX config for actor {actor}")
+        _set_idle_scene()
+        log.warning("[WARN] No DMX config for actor %s", actor)
         return
     light_ch = cfg["light_channel"]
     motor_ch = cfg["motor_channel"]
 
-    # Full light on, medium motor
-    dmx.set_channel(light_ch, 255)
-    dmx.set_channel(motor_ch, 128)
+    # Full light on, medium motor; everything else off, applied atomically
+    dmx.set_channels({light_ch: 255, motor_ch: 128}, reset=True)
 
 
 def _set_voting_scene(actor):
@@ -305,17 +546,38 @@ def _set_voting_scene(actor):
     Voting DMX: slightly different look to signal voting phase.
     For now: dimmer light, motor lower intensity.
     """
-    _set_idle_scene()
     cfg = ACTOR_CONFIG.get(actor)
     if not cfg:
-        print(f"[WARN] No DMX config for actor {actor} (voting)")
+        _set_idle_scene()
+        log.warning("[WARN] No DMX config for actor %s (voting)", actor)
         return
     light_ch = cfg["light_channel"]
     motor_ch = cfg["motor_channel"]
 
-    # e.g. half light, lower motor
-    dmx.set_channel(light_ch, 128)
-    dmx.set_channel(motor_ch, 80)
+    # e.g. half light, lower motor; everything else off
+    dmx.set_channels({light_ch: 128, motor_ch: 80}, reset=True)
+
+
+def _wait_for_slot(event, get_value, slot_start):
+    """
+    Block until get_value() is not None and MIN_SLOT_DURATION has passed since
+    slot_start (a time.monotonic() value, immune to wall-clock adjustments).
+    get_value is called with DRAMA_STATE["lock"] held; the lock is never held
+    while waiting. 'event' is set by the HTTP side whenever new data arrives.
+    Returns (value, elapsed).
+    """
+    while True:
+        event.clear()  # before reading, so a set() racing with us is not lost
+        with DRAMA_STATE["lock"]:
+            value = get_value()
+        if value is not None:
+            break
+        event.wait()
+
+    remaining = slot_start + MIN_SLOT_DURATION - time.monotonic()
+    if remaining > 0:
+        time.sleep(remaining)
+    return value, time.monotonic() - slot_start
 
 
 def _drama_loop():
@@ -330,64 +592,55 @@ def _drama_loop():
     with DRAMA_STATE["lock"]:
         actors_order = list(DRAMA_STATE["actors_order"])
         DRAMA_STATE["current_index"] = 0
+        DRAMA_STATE["version"] += 1
 
     for idx, actor in enumerate(actors_order):
+        started_at = time.time()  # wall clock, for /status only
         with DRAMA_STATE["lock"]:
             DRAMA_STATE["current_index"] = idx
             actor_entry = DRAMA_STATE["actor_data"][actor]
-            actor_entry["start_time"] = time.time()
+            actor_entry["start_time"] = started_at
             actor_entry["printed"] = False
+            DRAMA_STATE["version"] += 1
+        slot_start = time.monotonic()
 
-        print(f"[DRAMA] Discussion slot for actor={actor}")
+        log.info("[DRAMA] Discussion slot for actor=%s", actor)
         _set_active_actor_scene(actor)
 
-        # Wait loop for this actor's discussion slot
-        while True:
-            with DRAMA_STATE["lock"]:
-                actor_entry = DRAMA_STATE["actor_data"][actor]
-                text = actor_entry["text"]
-                start_time = actor_entry["start_time"]
-
-            elapsed = time.time() - start_time if start_time else 0
-
-            if text is not None and elapsed >= MIN_SLOT_DURATION:
-                printer.print_text(actor, text)
-                with DRAMA_STATE["lock"]:
-                    DRAMA_STATE["actor_data"][actor]["printed"] = True
-                print(f"[DRAMA] Finished discussion for {actor}, elapsed={elapsed:.1f}s")
-                break
+        # Wait until this actor's text has arrived and the slot minimum has passed
+        text, elapsed = _wait_for_slot(actor_entry["event"], lambda: actor_entry["text"], slot_start)
 
-            time.sleep(0.5)
+        _print_q.put((actor, text))
+        with DRAMA_STATE["lock"]:
+            DRAMA_STATE["actor_data"][actor]["printed"] = True  # queued; the worker prints in order
+            DRAMA_STATE["version"] += 1
+        log.info("[DRAMA] Finished discussion for %s, elapsed=%.1fs", actor, elapsed)
 
-    print("[DRAMA] Discussion phase complete. Starting voting dramatization.")
+    log.info("[DRAMA] Discussion phase complete. Starting voting dramatization.")
 
     # ---- VOTING PHASE ----
     for actor in actors_order:
-        print(f"[DRAMA] Voting slot for actor={actor}")
+        log.info("[DRAMA] Voting slot for actor=%s", actor)
         _set_voting_scene(actor)
-        slot_start = time.time()
-
-        while True:
-            with DRAMA_STATE["lock"]:
-                vote = DRAMA_STATE["votes"].get(actor)
-            elapsed = time.time() - slot_start
+        slot_start = time.monotonic()
 
-            if vote is not None and elapsed >= MIN_SLOT_DURATION:
-                vote_text = f"{actor.upper()}: {vote}"
-                printer.print_text(f"{actor} vote", vote_text)
-                print(f"[DRAMA] Finished voting dramatization for {actor}, elapsed={elapsed:.1f}s")
-                break
+        vote, elapsed = _wait_for_slot(
+            DRAMA_STATE["votes_event"], lambda: DRAMA_STATE["votes"].get(actor), slot_start
+        )
 
-            time.sleep(0.5)
+        vote_text = f"{actor.upper()}: {vote}"
+        _print_q.put((f"{actor} vote", vote_text))
+        log.info("[DRAMA] Finished voting dramatization for %s, elapsed=%.1fs", actor, elapsed)
 
     # ---- SUMMARY + IDLE ----
-    print("[DRAMA] All actors done voting. Printing voting summary and going idle.")
+    log.info("[DRAMA] All actors done voting. Printing voting summary and going idle.")
 
     with DRAMA_STATE["lock"]:
         votes_copy = dict(DRAMA_STATE["votes"])
         DRAMA_STATE["running"] = False
         DRAMA_STATE["current_index"] = -1
         DRAMA_STATE["voting_done"] = True
+        DRAMA_STATE["version"] += 1
 
     if votes_copy:
         summary_lines = ["VOTING SUMMARY", ""]
@@ -396,11 +649,11 @@ def _drama_loop():
             if v is not None:
                 summary_lines.append(f"{actor.upper()}: {v}")
         summary_text = "\n".join(summary_lines) + "\n"
-        printer.print_text("votes", summary_text)
-        print("[DRAMA] Printed voting summary")
+        _print_q.put(("votes", summary_text))
+        log.info("[DRAMA] Queued voting summary")
 
     _set_idle_scene()
-    print("[DRAMA] Idle scene set.")
+    log.info("[DRAMA] Idle scene set.")
 
 
 def start_drama_run(prompt, proposer="human", order=None):
@@ -426,16 +679,14 @@ def start_drama_run(prompt, proposer="human", order=None):
         DRAMA_STATE["running"] = True
         DRAMA_STATE["votes"] = {}
         DRAMA_STATE["voting_done"] = False
+        DRAMA_STATE["version"] += 1
 
     _set_idle_scene()
 
     # Print proposal at the beginning
-    try:
-        proposal_text = f"Proposal by {proposer}:\n\n{prompt}"
-        printer.print_text("proposal", proposal_text)
-        print("[DRAMA] Printed proposal")
-    except Exception as e:
-        print("[PRINTER][ERROR] Could not print proposal:", e)
+    proposal_text = f"Proposal by {proposer}:\n\n{prompt}"
+    _print_q.put(("proposal", proposal_text))
+    log.info("[DRAMA] Queued proposal")
 
     # Kick off AI parliament in another thread so we don't block
     def ai_starter():
@@ -445,14 +696,14 @@ def start_drama_run(prompt, proposer="human", order=None):
                 "proposer": proposer,
                 "order": actors_order,
             }
-            resp = requests.post(
+            resp = AI_SESSION.post(
                 f"{AI_SERVER_BASE_URL}/parliament",
                 json=payload,
-                timeout=30,
+                timeout=AI_SERVER_TIMEOUT,
             )
-            print("[DRAMA] AI parliament start response:", resp.status_code)
+            log.info("[DRAMA] AI parliament start response: %s", resp.status_code)
         except Exception as e:
-            print("[ERROR] Failed to start parliament on AI server:", e)
+            log.error("[ERROR] Failed to start parliament on AI server: %s", e)
 
     threading.Thread(target=ai_starter, daemon=True).start()
 
@@ -476,8 +727,9 @@ def start_endpoint():
         return jsonify({"error": "Missing 'prompt'"}), 400
 
     with DRAMA_STATE["lock"]:
-        if DRAMA_STATE["running"]:
-            return jsonify({"error": "Drama already running"}), 400
+        already_running = DRAMA_STATE["running"]
+    if already_running:
+        return jsonify({"error": "Drama already running"}), 400
 
     start_drama_run(prompt, proposer, order)
     return jsonify({"status": "started"})
@@ -492,62 +744,107 @@ def actor_text():
     if not actor or not text:
         return jsonify({"error": "Both 'actor' and 'text' required"}), 400
 
-    with DRAMA_STATE["lock"]:
-        if actor not in DRAMA_STATE["actor_data"]:
-            return jsonify({"error": f"Unknown or inactive actor '{actor}'"}), 400
-        DRAMA_STATE["actor_data"][actor]["text"] = text
+    if actor not in DRAMA_STATE["actor_data"]:
+        return jsonify({"error": f"Unknown or inactive actor '{actor}'"}), 400
+    _queue_texts([(actor, text)])
 
-    print(f"[DRAMA] Received text for actor={actor}, len={len(text)}")
+    log.info("[DRAMA] Received text for actor=%s, len=%d", actor, len(text))
     return jsonify({"status": "ok"})
 
 
+@app.route("/actor_texts", methods=["POST"])
+def actor_texts():
+    """
+    Batch version of /actor_text: {"texts": {actor: text, ...}}.
+    Known actors are queued for the flusher; unknown ones are reported back.
+    """
+    data = request.get_json(force=True)
+    texts = data.get("texts")
+
+    if not isinstance(texts, dict) or not texts:
+        return jsonify({"error": "'texts' must be a non-empty object of actor -> text"}), 400
+
+    known, unknown = [], []
+    for actor, text in texts.items():
+        if text and actor in DRAMA_STATE["actor_data"]:
+            known.append((actor, text))
+        else:
+            unknown.append(actor)
+    _queue_texts(known)
+
+    log.info("[DRAMA] Received texts for %d actors%s",
+             len(texts) - len(unknown), f", ignored {unknown}" if unknown else "")
+    return jsonify({"status": "ok", "ignored": unknown})
+
+
 @app.route("/actor_vote", methods=["POST"])
 def actor_vote():
+    """
+    Accepts either a single vote {"actor": ..., "vote": ...}
+    or all votes at once {"votes": {actor: vote, ...}}.
+    """
     data = request.get_json(force=True)
-    actor = data.get("actor")
-    vote = data.get("vote")
-
-    if not actor or vote is None:
-        return jsonify({"error": "Both 'actor' and 'vote' required"}), 400
+    votes = data.get("votes")
+    if votes is None:
+        actor = data.get("actor")
+        vote = data.get("vote")
+        if not actor or vote is None:
+            return jsonify({"error": "Both 'actor' and 'vote' required"}), 400
+        votes = {actor: vote}
+    elif not isinstance(votes, dict):
+        return jsonify({"error": "'votes' must be an object of actor -> vote"}), 400
 
     with DRAMA_STATE["lock"]:
-        DRAMA_STATE["votes"][actor] = vote
-        print(f"[DRAMA] Received vote: {actor} -> {vote}")
+        DRAMA_STATE["votes"].update(votes)
+        DRAMA_STATE["version"] += 1
+    DRAMA_STATE["votes_event"].set()  # one wake-up for the whole batch
 
+    # Log after releasing the lock, one record per request
+    log.info("[DRAMA] Received %d vote(s): %s", len(votes), votes)
     return jsonify({"status": "ok"})
 
 
 @app.route("/status", methods=["GET"])
 def status():
+    global _status_cache
+    # Only copy raw values under the lock; build the response after releasing it.
+    # The UI polls this: if nothing changed since the last build, resend those bytes.
     with DRAMA_STATE["lock"]:
+        version = DRAMA_STATE["version"]
+        if _status_cache[0] == version:
+            return app.response_class(_status_cache[1], mimetype="application/json")
         current_index = DRAMA_STATE["current_index"]
         running = DRAMA_STATE["running"]
-        actors_order = list(DRAMA_STATE["actors_order"])
-        actor_data_copy = {
-            actor: {
-                "has_text": (info["text"] is not None),
-                "start_time": info["start_time"],
-                "printed": info["printed"],
-            }
-            for actor, info in DRAMA_STATE["actor_data"].items()
-        }
-        votes_copy = dict(DRAMA_STATE["votes"])
+        actors_order = DRAMA_STATE["actors_order"]  # replaced, never mutated, per run
+        raw_actor_data = [(actor, info.copy()) for actor, info in DRAMA_STATE["actor_data"].items()]
+        votes_copy = DRAMA_STATE["votes"].copy()
         voting_done = DRAMA_STATE["voting_done"]
 
+    actor_data_copy = {
+        actor: {
+            "has_text": info["text"] is not None,
+            "start_time": info["start_time"],
+            "printed": info["printed"],
+        }
+        for actor, info in raw_actor_data
+    }
+
     current_actor = (
         actors_order[current_index]
         if (running and current_index >= 0 and current_index < len(actors_order))
         else None
     )
 
-    return jsonify({
+    body = app.json.dumps({
         "running": running,
         "current_actor": current_actor,
         "actors_order": actors_order,
         "actor_data": actor_data_copy,
         "votes": votes_copy,
         "voting_done": voting_done,
-    })
+    }, separators=(",", ":")).encode("utf-8") + b"\n"  # same bytes jsonify sends
+    _status_cache = (version, body)
+    return app.response_class(body, mimetype="application/json")
 
 
 @app.route("/ping", methods=["GET"])
@@ -556,7 +853,8 @@ def ping():
 
 
 if __name__ == "__main__":
+    from serve import serve_app
     try:
-        app.run(host="0.0.0.0", port=8001, debug=True)
+        serve_app(app, port=8001)
     finally:
         dmx.stop()
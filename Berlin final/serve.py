@@ -0,0 +1,51 @@
+"""
+Production entrypoint: serve the parliament or dramatization app with waitress
+(multi-threaded, keep-alive) instead of Flask's development server.
+
+    python serve.py parliament   # AI parliament server on :8000
+    python serve.py drama        # dramatization server on :8001
+
+Running convivial_v2.py or drama.py directly does the same for that app.
+Add --dev for Flask's debug server. Its reloader stays off: it re-imports
+the module in a child process, which would create a second DMXController
+(socket + sender thread) and open the USB printer twice.
+"""
+import importlib
+import sys
+
+from waitress import serve
+
+APPS = {
+    "parliament": ("convivial_v2", 8000),
+    "drama": ("drama", 8001),
+}
+
+
+def serve_app(app, port, threads=8, dev=None):
+    if dev is None:
+        dev = "--dev" in sys.argv
+    if dev:
+        app.run(host="0.0.0.0", port=port, debug=True, use_reloader=False)
+        return
+    serve(app, host="0.0.0.0", port=port, threads=threads, connection_limit=200)
+
+
+def main(argv):
+    args = [a for a in argv[1:] if a != "--dev"]
+    if len(args) != 1 or args[0] not in APPS:
+        print(f"Usage: python serve.py [{'|'.join(APPS)}] [--dev]")
+        return 2
+
+    module_name, port = APPS[args[0]]
+    module = importlib.import_module(module_name)
+    try:
+        serve_app(module.app, port)
+    finally:
+        # DMX controller / printer are module-level singletons of drama.py
+        if hasattr(module, "dmx"):
+            module.dmx.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
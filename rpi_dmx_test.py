@@ -1,26 +1,48 @@
 import asyncio
-from pyartnet import ArtNetNode
+import struct
 
-async def main():
-    node_ip = "192.168.1.20"
-    async with ArtNetNode.create(node_ip) as node:
-        universe = node.add_universe(0)
+NODE_IP = "192.168.1.20"
+ARTNET_PORT = 6454
+UNIVERSE = 0
+UNIVERSE_SIZE = 512
+
+# Art-Net OpDmx header: OpCode is little-endian, ProtVer (14) and Length big-endian
+ARTNET_HEADER = struct.pack("<8sH", b"Art-Net\x00", 0x5000) + struct.pack(
+    ">HBBBBH", 14, 0, 0, UNIVERSE & 0xFF, (UNIVERSE >> 8) & 0xFF, UNIVERSE_SIZE
+)
+_SEQ_OFFSET = 12  # Sequence byte; 0 means "not used", so we cycle 1..255
+
+# One preallocated frame: channel updates mutate it in place, nothing is
+# allocated per send (matters once this grows into a 44 Hz fade loop)
+_FRAME = bytearray(len(ARTNET_HEADER) + UNIVERSE_SIZE)
+_FRAME[:len(ARTNET_HEADER)] = ARTNET_HEADER
+_MV = memoryview(_FRAME)
+DMX = _MV[len(ARTNET_HEADER):]  # channel 1 is DMX[0]
 
-        # Light 1 = channels 1–10
-        light1 = universe.add_channel(start=1, width=10)
 
-        # Light 2 = channels 11–20
-        light2 = universe.add_channel(start=11, width=10)
+def send_frame(transport):
+    """Bump the Art-Net sequence number and send the current frame."""
+    _FRAME[_SEQ_OFFSET] = _FRAME[_SEQ_OFFSET] % 255 + 1
+    transport.sendto(_MV)
 
-        # Light 3 = channels 21–30
-        light3 = universe.add_channel(start=21, width=10)
 
+async def main():
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(
+        asyncio.DatagramProtocol, remote_addr=(NODE_IP, ARTNET_PORT)
+    )
+    try:
         # Example: Set all to different colours
         # [Master, R, G, B, White, Amber, UV, Strobe, Macro, MacroSpeed]
-        await light1.add_fade([255, 255, 0, 0, 0, 0, 0, 0, 0, 0], 0)  # Red
-        await light2.add_fade([255, 0, 255, 0, 0, 0, 0, 0, 0, 0], 0)  # Green
-        await light3.add_fade([255, 0, 0, 255, 0, 0, 0, 0, 0, 0], 0)  # Blue
+        DMX[0:10] = bytes([255, 255, 0, 0, 0, 0, 0, 0, 0, 0])   # Light 1 = channels 1–10: Red
+        DMX[10:20] = bytes([255, 0, 255, 0, 0, 0, 0, 0, 0, 0])  # Light 2 = channels 11–20: Green
+        DMX[20:30] = bytes([255, 0, 0, 255, 0, 0, 0, 0, 0, 0])  # Light 3 = channels 21–30: Blue
+
+        # All three lights share universe 0, so one frame (one UDP send) sets them all
+        send_frame(transport)
 
         await asyncio.sleep(0.2)
+    finally:
+        transport.close()
 
 asyncio.run(main())
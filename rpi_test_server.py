@@ -1,131 +1,155 @@
-from flask import Flask, jsonify, request
-import socket
-import threading
+from flask import Flask, Response, jsonify, request
 import atexit
+import hashlib
+import os
+import threading
 import sys
-import traceback
+
+import udp_util
+from udp_util import (
+    get_local_broadcast,
+    get_local_ip,
+    make_broadcast_from_ip,
+    send_udp_fast,
+)
 
 app = Flask(__name__)
 
 # -------- CONFIG --------
 TARGET = None
-UDP_PORT = 6454
-SOCKET_TIMEOUT = 1.0
+UDP_PORT = udp_util.UDP_PORT
+# Socket timeout / send buffer settings live in udp_util
 # ------------------------
 
+# Set after a successful /start, cleared after /stop; readers need no lock
+_started_event = threading.Event()
+# Held by /start and /stop around send + flag, so the flag always matches the
+# last command the device received
 _state_lock = threading.Lock()
-_is_started = False
 
 
-# ------------------ Network Helpers ------------------
+# ------------------ Command target ------------------
 
-def get_local_ip():
-    try:
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.connect(("8.8.8.8", 80))
-        local_ip = s.getsockname()[0]
-        s.close()
-        return local_ip
-    except Exception:
-        return None
+_START_PAYLOAD = b'1'
+_STOP_PAYLOAD = b'0'
+
+# set_target() only records the target; the first /start or /stop resolves
+# it onto its own connected socket, so sends are a plain send(): the kernel
+# keeps the route on the socket. Guarded by _state_lock.
+_target_spec = (TARGET, UDP_PORT)
+_target_addr = None
+_target_sock = None
+_target_connected = False
+# /status can only ever be one of two bodies per target: prebuilt by set_target()
+_status_bodies = {}
 
 
-def make_broadcast_from_ip(ip_addr: str) -> str:
+def set_target(target, port: int = UDP_PORT):
+    """Set the command target; it is resolved and connected on the next send."""
+    global _target_spec, _target_sock, _status_bodies
+    # Same bytes jsonify would send: compact, sorted keys, trailing newline
+    _status_bodies = {
+        started: app.json.dumps({"started": started, "target": target, "port": port},
+                                separators=(",", ":")).encode("utf-8") + b"\n"
+        for started in (False, True)
+    }
+    with _state_lock:
+        _target_spec = (target, port)
+        if _target_sock is not None:
+            _target_sock.close()
+            _target_sock = None
+
+
+def _ensure_target():
+    """Resolve _target_spec and connect a dedicated socket to it, once."""
+    global _target_addr, _target_sock, _target_connected
+    if _target_sock is not None:
+        return
+    target, port = _target_spec
+    target_ip, broadcast_flag = udp_util.resolve_target(target)
+    sock = udp_util.build_socket(broadcast_flag)
     try:
-        parts = ip_addr.split(".")
-        if len(parts) == 4:
-            parts[-1] = "255"
-            return ".".join(parts)
-    except Exception:
-        pass
-    return "192.168.1.255"
+        sock.connect((target_ip, port))
+        connected = True
+    except OSError as e:
+        app.logger.warning("Could not connect UDP socket to %s:%d, using sendto: %s",
+                           target_ip, port, e)
+        connected = False
+    _target_addr, _target_sock, _target_connected = (target_ip, port), sock, connected
+
+
+def _send_command(payload: bytes):
+    """Send one command byte; caller holds _state_lock."""
+    _ensure_target()
+    if _target_connected:
+        _target_sock.send(payload)
+    else:
+        send_udp_fast(_target_sock, payload, _target_addr)
 
 
-def get_local_broadcast():
-    local_ip = get_local_ip()
-    if local_ip:
-        return make_broadcast_from_ip(local_ip)
-    return "192.168.1.255"
-
-
-def build_socket(broadcast=False):
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    sock.settimeout(SOCKET_TIMEOUT)
-    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    if broadcast:
-        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-    return sock
-
-
-def send_udp(payload: bytes, target: str, port: int = UDP_PORT):
-    """
-    Send a single UDP payload.
-    No keepalive, no looping.
-    """
-    if target is None:
-        target_ip = get_local_broadcast()
-        broadcast_flag = True
-    elif isinstance(target, str) and target.lower() == "broadcast":
-        target_ip = get_local_broadcast()
-        broadcast_flag = True
-    else:
-        target_ip = target
-        if not isinstance(target_ip, str):
-            target_ip = get_local_broadcast()
-            broadcast_flag = True
-        else:
-            broadcast_flag = target_ip.endswith(".255")
+@atexit.register
+def _close_target_sock():
+    if _target_sock is not None:
+        _target_sock.close()
+
+
+def refresh_local_broadcast():
+    """Re-detect the network (e.g. after an interface change) and re-resolve TARGET."""
+    broadcast = udp_util.refresh_local_broadcast()
+    # Only an unresolved None / "broadcast" TARGET (the import-time default)
+    # follows the new network; __main__ always sets a concrete IP, which stays
+    set_target(TARGET, UDP_PORT)
+    return broadcast
 
-    sock = build_socket(broadcast_flag)
-    try:
-        app.logger.debug("send_udp: to %s:%d  (broadcast=%s)", target_ip, port, broadcast_flag)
-        sock.sendto(payload, (target_ip, port))
-    finally:
-        sock.close()
+
+set_target(TARGET, UDP_PORT)  # prebuilds /status only; nothing is resolved yet
 
 
 # ------------------ Flask Endpoints ------------------
 
 @app.route("/start", methods=["POST"])
 def start_cmd():
-    global _is_started
     with _state_lock:
         try:
-            send_udp(b'1', TARGET, UDP_PORT)
+            _send_command(_START_PAYLOAD)
         except Exception as e:
             app.logger.exception("Failed to send start UDP")
             return jsonify({"ok": False, "error": str(e)}), 500
-
-        _is_started = True
+        _started_event.set()
     return jsonify({"ok": True, "action": "started", "target": TARGET})
 
 
 @app.route("/stop", methods=["POST"])
 def stop_cmd():
-    global _is_started
     with _state_lock:
         try:
-            send_udp(b'0', TARGET, UDP_PORT)
+            _send_command(_STOP_PAYLOAD)
         except Exception as e:
             app.logger.exception("Failed to send stop UDP")
             return jsonify({"ok": False, "error": str(e)}), 500
-
-        _is_started = False
+        _started_event.clear()
     return jsonify({"ok": True, "action": "stopped", "target": TARGET})
 
 
 @app.route("/status", methods=["GET"])
 def status():
-    return jsonify({
-        "started": _is_started,
-        "target": TARGET,
-        "port": UDP_PORT
-    })
+    return Response(_status_bodies[_started_event.is_set()], mimetype="application/json")
+
+
+# The index never changes: serialize it once and let clients revalidate via ETag
+_INDEX_BODY = app.json.dumps(
+    {"ok": True, "endpoints": ["/start (POST)", "/stop (POST)", "/status (GET)"]},
+    separators=(",", ":"),
+).encode("utf-8") + b"\n"  # same bytes jsonify would send
+_INDEX_ETAG = hashlib.md5(_INDEX_BODY).hexdigest()
 
 
 @app.route("/")
 def index():
-    return jsonify({"ok": True, "endpoints": ["/start (POST)", "/stop (POST)", "/status (GET)"]})
+    resp = Response(_INDEX_BODY, mimetype="application/json")
+    resp.set_etag(_INDEX_ETAG)
+    resp.headers["Cache-Control"] = "public, max-age=60"
+    return resp.make_conditional(request)  # 304 if If-None-Match matches
 
 
 # ------------------ Main ------------------
@@ -142,9 +166,16 @@ if __name__ == "__main__":
 
     if len(sys.argv) >= 3:
         UDP_PORT = int(sys.argv[2])
+    set_target(TARGET, UDP_PORT)
 
     app.logger.info("Starting server. TARGET = %s  PORT = %d", TARGET, UDP_PORT)
     local_ip = get_local_ip()
     app.logger.info("Local IP detected = %s  Broadcast = %s", local_ip, get_local_broadcast())
 
-    app.run(host="0.0.0.0", port=5000, threaded=True)
+    if os.environ.get("USE_DEV_SERVER"):
+        app.run(host="0.0.0.0", port=5000, threaded=True)
+    else:
+        # Single process on purpose: start state and the target socket are
+        # module globals, shared across waitress' worker threads
+        from waitress import serve
+        serve(app, host="0.0.0.0", port=5000, threads=8)
@@ -0,0 +1,127 @@
+"""
+Shared UDP helpers for the Pi test scripts: local IP / broadcast detection,
+target resolution, socket construction and the send function. Callers own
+their sockets (rpi_test_server keeps one connected to its target).
+"""
+import functools
+import logging
+import os
+import socket
+
+log = logging.getLogger("udp_util")
+
+# -------- CONFIG --------
+UDP_PORT = 6454
+SOCKET_TIMEOUT = 1.0
+# Kernel send buffer per UDP socket. Values above net.core.wmem_max are capped
+# silently; raise it first, e.g. sudo sysctl -w net.core.wmem_max=12582912
+UDP_SNDBUF = int(os.environ.get("UDP_SNDBUF", 1 << 20))
+# ------------------------
+
+
+# ------------------ Local address ------------------
+
+# Cached by get_local_ip() / get_local_broadcast(); see refresh_local_broadcast()
+_LOCAL_IP = None
+_LOCAL_BROADCAST = None
+
+
+def _probe_local_ip():
+    # A UDP connect() sends nothing: it only asks the kernel which local address
+    # routes to a public IP. The literal address needs no DNS lookup.
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.settimeout(0.5)  # fail fast on a misconfigured / offline network stack
+            s.connect(("8.8.8.8", 80))
+            return s.getsockname()[0]
+    except Exception:
+        return None
+
+
+def get_local_ip():
+    global _LOCAL_IP
+    if _LOCAL_IP is None:
+        _LOCAL_IP = _probe_local_ip()  # stays None (and is retried) while offline
+    return _LOCAL_IP
+
+
+def make_broadcast_from_ip(ip_addr: str) -> str:
+    try:
+        parts = ip_addr.split(".")
+        if len(parts) == 4:
+            parts[-1] = "255"
+            return ".".join(parts)
+    except Exception:
+        pass
+    return "192.168.1.255"
+
+
+def get_local_broadcast():
+    global _LOCAL_BROADCAST
+    if _LOCAL_BROADCAST is None:
+        local_ip = get_local_ip()
+        if not local_ip:
+            return "192.168.1.255"
+        _LOCAL_BROADCAST = make_broadcast_from_ip(local_ip)
+    return _LOCAL_BROADCAST
+
+
+def refresh_local_broadcast():
+    """Forget the cached local IP / broadcast (e.g. after an interface change)."""
+    global _LOCAL_IP, _LOCAL_BROADCAST
+    _LOCAL_IP = _LOCAL_BROADCAST = None
+    resolve_target.cache_clear()
+    return get_local_broadcast()
+
+
+@functools.lru_cache(maxsize=8)
+def resolve_target(target):
+    """
+    Map a target (None, "broadcast" or an IP) to (target_ip, broadcast_flag).
+    Memoized: targets are few and fixed; refresh_local_broadcast() clears it.
+    """
+    if target is None:
+        target_ip = get_local_broadcast()
+        broadcast_flag = True
+    elif isinstance(target, str) and target.lower() == "broadcast":
+        target_ip = get_local_broadcast()
+        broadcast_flag = True
+    else:
+        target_ip = target
+        if not isinstance(target_ip, str):
+            target_ip = get_local_broadcast()
+            broadcast_flag = True
+        else:
+            broadcast_flag = target_ip.endswith(".255")
+    return target_ip, broadcast_flag
+
+
+# ------------------ Sockets ------------------
+
+def build_socket(broadcast=False):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.settimeout(SOCKET_TIMEOUT)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if broadcast:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, UDP_SNDBUF)
+    except OSError:
+        log.warning("Could not set SO_SNDBUF=%d", UDP_SNDBUF)
+    # Linux reports double the requested size (bookkeeping overhead included),
+    # so anything below UDP_SNDBUF means net.core.wmem_max capped the request.
+    # Warn then: nothing configures this logger and INFO would be dropped.
+    effective = sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF)
+    if effective < UDP_SNDBUF:
+        log.warning("UDP socket (broadcast=%s) SO_SNDBUF = %d, below the requested %d;"
+                    " raise net.core.wmem_max", broadcast, effective, UDP_SNDBUF)
+    else:
+        log.info("UDP socket (broadcast=%s) SO_SNDBUF = %d", broadcast, effective)
+    return sock
+
+
+# ------------------ Sending ------------------
+
+def send_udp_fast(sock, payload: bytes, addr):
+    """Send to an already-resolved (ip, port) on an already-chosen socket."""
+    sock.sendto(payload, addr)